@@ -41,11 +41,14 @@ class FontParser:
         }
 
     def parse_font_for_string(self, s):
-        for c in s:
+        # Most texts repeat a few characters, only look at each one once.
+        for c in dict.fromkeys(s):
+            if c in self.parsed_font:
+                continue
             if c == '\t' and ' ' not in self.parsed_font:
                 # tabs rely on space char to calculate offset
                 self.parsed_font[' '] = self.parse_font_char(' ')
-            if c not in self.parsed_font and ord(c) >= ord(' '):
+            if ord(c) >= ord(' '):
                 self.parsed_font[c] = self.parse_font_char(c)
 
     def get_parsed_font(self):
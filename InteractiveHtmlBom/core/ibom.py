@@ -249,7 +249,10 @@ def round_floats(o, precision):
     if isinstance(o, dict):
         return {k: round_floats(v, precision) for k, v in o.items()}
     if isinstance(o, (list, tuple)):
-        return [round_floats(x, precision) for x in o]
+        # Coordinate lists make up most of pcbdata, round float elements
+        # inline to avoid a recursive call per number.
+        return [round(x, precision) if type(x) is float
+                else round_floats(x, precision) for x in o]
     return o
 
 
@@ -257,7 +260,7 @@ def get_pcbdata_javascript(pcbdata, compression):
     from .lzstring import LZString
 
     js = "var pcbdata = {}"
-    pcbdata_str = json.dumps(round_floats(pcbdata, 6))
+    pcbdata_str = json.dumps(round_floats(pcbdata, 6), separators=(',', ':'))
 
     if compression:
         log.info("Compressing pcb data")
@@ -307,11 +310,14 @@ def generate_file(pcb_file_dir, pcb_file_name, pcbdata, config):
                         get_file_content('userheader.html'))
     html = html.replace('///USERFOOTER///',
                         get_file_content('userfooter.html'))
-    # Replace pcbdata last for better performance.
-    html = html.replace('///PCBDATA///', pcbdata_js)
+    # Write pcbdata between the template halves instead of substituting it,
+    # this avoids another copy of the largest string in memory.
+    html_head, _, html_tail = html.partition('///PCBDATA///')
 
     with io.open(bom_file_name, 'wt', encoding='utf-8') as bom:
-        bom.write(html)
+        bom.write(html_head)
+        bom.write(pcbdata_js)
+        bom.write(html_tail)
 
     log.info("Created file %s", bom_file_name)
     return bom_file_name
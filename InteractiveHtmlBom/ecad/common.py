@@ -145,13 +145,14 @@ class EcadParser(object):
 class Component(object):
     """Simple data object to store component data needed for bom table."""
 
-    def __init__(self, ref, val, footprint, layer, attr=None, extra_fields={}):
+    def __init__(self, ref, val, footprint, layer, attr=None,
+                 extra_fields=None):
         self.ref = ref
         self.val = val
         self.footprint = footprint
         self.layer = layer
         self.attr = attr
-        self.extra_fields = extra_fields
+        self.extra_fields = extra_fields if extra_fields is not None else {}
 
 
 class BoundingBox(object):
@@ -1,3 +1,5 @@
+import collections
+import itertools
 import os
 from datetime import datetime
 
@@ -22,6 +24,90 @@ if hasattr(pcbnew, 'Version'):
         pass
     KICAD_VERSION = version
 
+_LAYER_MAP = {
+    pcbnew.F_Cu: "F",
+    pcbnew.B_Cu: "B",
+}
+
+_PAD_SHAPE_MAP = {
+    pcbnew.PAD_SHAPE_RECT: "rect",
+    pcbnew.PAD_SHAPE_OVAL: "oval",
+    pcbnew.PAD_SHAPE_CIRCLE: "circle",
+}
+if hasattr(pcbnew, "PAD_SHAPE_TRAPEZOID"):
+    _PAD_SHAPE_MAP[pcbnew.PAD_SHAPE_TRAPEZOID] = "trapezoid"
+if hasattr(pcbnew, "PAD_SHAPE_ROUNDRECT"):
+    _PAD_SHAPE_MAP[pcbnew.PAD_SHAPE_ROUNDRECT] = "roundrect"
+if hasattr(pcbnew, "PAD_SHAPE_CUSTOM"):
+    _PAD_SHAPE_MAP[pcbnew.PAD_SHAPE_CUSTOM] = "custom"
+if hasattr(pcbnew, "PAD_SHAPE_CHAMFERED_RECT"):
+    _PAD_SHAPE_MAP[pcbnew.PAD_SHAPE_CHAMFERED_RECT] = "chamfrect"
+
+_DRILL_SHAPE_MAP = {
+    pcbnew.PAD_DRILL_SHAPE_CIRCLE: "circle",
+    pcbnew.PAD_DRILL_SHAPE_OBLONG: "oblong",
+}
+
+if hasattr(pcbnew, 'PAD_ATTRIB_PTH'):
+    _THROUGH_HOLE_ATTRIBUTES = frozenset([pcbnew.PAD_ATTRIB_PTH,
+                                          pcbnew.PAD_ATTRIB_NPTH])
+else:
+    _THROUGH_HOLE_ATTRIBUTES = frozenset([pcbnew.PAD_ATTRIB_STANDARD,
+                                          pcbnew.PAD_ATTRIB_HOLE_NOT_PLATED])
+
+if hasattr(pcbnew, 'MODULE'):
+    _FOOTPRINT_CLASS = pcbnew.MODULE
+else:
+    _FOOTPRINT_CLASS = pcbnew.FOOTPRINT
+
+# Class names differ between KiCad versions.
+_VIA_CLASSES = frozenset(["VIA", "PCB_VIA"])
+_ARC_CLASSES = frozenset(["ARC", "PCB_ARC"])
+
+
+def trapezoid_polygon(size, delta):
+    """Returns polygon points of a trapezoid pad with given size and delta."""
+    hx, hy = size[0] / 2, size[1] / 2
+    dx, dy = delta[0] / 2, delta[1] / 2
+    return [
+        [hx + dy, hy - dx],
+        [-hx - dy, hy + dx],
+        [-hx + dy, -hy - dx],
+        [hx - dy, -hy + dx],
+    ]
+
+
+_PIN1_NAMES = frozenset(['1', 'A', 'A1', 'P1', 'PAD1'])
+
+
+def mark_pin1(pads):
+    """Tries to guess first pin of a footprint and marks it.
+    :param pads: list of (pad name, pad dict) tuples
+    :return: list of pad dicts
+    """
+    if not pads:
+        return []
+    # Find smallest common first pin name and smallest name in one pass.
+    pin1_pad_name = None
+    min_pad_name = pads[0][0]
+    for pad_name, _ in pads:
+        if pad_name < min_pad_name:
+            min_pad_name = pad_name
+        if pad_name in _PIN1_NAMES and (pin1_pad_name is None or
+                                        pad_name < pin1_pad_name):
+            pin1_pad_name = pad_name
+    if pin1_pad_name is None:
+        # No pads have common first pin name,
+        # pick lexicographically smallest.
+        pin1_pad_name = min_pad_name
+    result = []
+    for pad_name, pad_dict in pads:
+        if pad_name == pin1_pad_name:
+            pad_dict['pin1'] = 1
+        result.append(pad_dict)
+
+    return result
+
 
 class PcbnewParser(EcadParser):
 
@@ -35,6 +121,27 @@ class PcbnewParser(EcadParser):
         else:
             self.footprints = list(self.board.GetFootprints())  # type: list[pcbnew.FOOTPRINT]
         self.font_parser = FontParser()
+        # Counts of skipped unsupported items, logged once per parse()
+        self.unsupported = collections.Counter()
+        self.shape_parsers = {
+            pcbnew.S_SEGMENT: self.parse_segment_shape,
+            pcbnew.S_CIRCLE: self.parse_circle_shape,
+            pcbnew.S_ARC: self.parse_arc_shape,
+            pcbnew.S_POLYGON: self.parse_polygon_shape,
+            pcbnew.S_CURVE: self.parse_curve_shape,
+            pcbnew.S_RECT: self.parse_rect_shape,
+        }
+        # Dimensions are matched by class name prefix in parse_drawing
+        self.drawing_parsers = {
+            "DRAWSEGMENT": self.parse_shape,
+            "MGRAPHIC": self.parse_shape,
+            "PCB_SHAPE": self.parse_shape,
+            "PTEXT": self.parse_text,
+            "MTEXT": self.parse_text,
+            "FP_TEXT": self.parse_text,
+            "PCB_TEXT": self.parse_text,
+            "PCB_FIELD": self.parse_text,
+        }
 
     def get_extra_field_data(self, file_name):
         if os.path.abspath(file_name) == os.path.abspath(self.file_name):
@@ -102,12 +209,18 @@ class PcbnewParser(EcadParser):
     def normalize(point):
         return [point.x * 1e-6, point.y * 1e-6]
 
+    @staticmethod
+    def normalize_segment(seg):
+        # type: (pcbnew.SEG) -> list
+        a, b = seg.A, seg.B
+        return [[a.x * 1e-6, a.y * 1e-6], [b.x * 1e-6, b.y * 1e-6]]
+
     @staticmethod
     def normalize_angle(angle):
-        if isinstance(angle, int) or isinstance(angle, float):
+        # KiCad 6 and earlier use tenths of degree, later versions EDA_ANGLE
+        if isinstance(angle, (int, float)):
             return angle * 0.1
-        else:
-            return angle.AsDegrees()
+        return angle.AsDegrees()
 
     def get_arc_angles(self, d):
         # type: (pcbnew.PCB_SHAPE) -> tuple
@@ -122,112 +235,115 @@ class PcbnewParser(EcadParser):
 
     def parse_shape(self, d):
         # type: (pcbnew.PCB_SHAPE) -> dict | None
-        shape = {
-            pcbnew.S_SEGMENT: "segment",
-            pcbnew.S_CIRCLE: "circle",
-            pcbnew.S_ARC: "arc",
-            pcbnew.S_POLYGON: "polygon",
-            pcbnew.S_CURVE: "curve",
-            pcbnew.S_RECT: "rect",
-        }.get(d.GetShape(), "")
-        if shape == "":
-            self.logger.info("Unsupported shape %s, skipping", d.GetShape())
+        shape_parser = self.shape_parsers.get(d.GetShape())
+        if shape_parser is None:
+            self.unsupported["shape %s" % d.GetShape()] += 1
             return None
-        start = self.normalize(d.GetStart())
-        end = self.normalize(d.GetEnd())
-        if shape == "segment":
-            return {
-                "type": shape,
-                "start": start,
-                "end": end,
-                "width": d.GetWidth() * 1e-6
-            }
+        return shape_parser(d)
 
-        if shape == "rect":
-            if hasattr(d, "GetRectCorners"):
-                points = list(map(self.normalize, d.GetRectCorners()))
-            else:
-                points = [
-                    start,
-                    [end[0], start[1]],
-                    end,
-                    [start[0], end[1]]
-                ]
-            shape_dict = {
-                "type": "polygon",
-                "pos": [0, 0],
-                "angle": 0,
-                "polygons": [points],
-                "width": d.GetWidth() * 1e-6,
-                "filled": 0
-            }
-            if hasattr(d, "IsFilled") and d.IsFilled():
-                shape_dict["filled"] = 1
-            return shape_dict
-
-        if shape == "circle":
-            shape_dict = {
-                "type": shape,
-                "start": start,
-                "radius": d.GetRadius() * 1e-6,
-                "width": d.GetWidth() * 1e-6
-            }
-            if hasattr(d, "IsFilled") and d.IsFilled():
-                shape_dict["filled"] = 1
-            return shape_dict
-
-        if shape == "arc":
-            a1, a2 = self.get_arc_angles(d)
-            if hasattr(d, "GetCenter"):
-                start = self.normalize(d.GetCenter())
-            return {
-                "type": shape,
-                "start": start,
-                "radius": d.GetRadius() * 1e-6,
-                "startangle": a1,
-                "endangle": a2,
-                "width": d.GetWidth() * 1e-6
-            }
+    def parse_segment_shape(self, d):
+        # type: (pcbnew.PCB_SHAPE) -> dict
+        return {
+            "type": "segment",
+            "start": self.normalize(d.GetStart()),
+            "end": self.normalize(d.GetEnd()),
+            "width": d.GetWidth() * 1e-6
+        }
 
-        if shape == "polygon":
-            if hasattr(d, "GetPolyShape"):
-                polygons = self.parse_poly_set(d.GetPolyShape())
-            else:
-                self.logger.info(
-                    "Polygons not supported for KiCad 4, skipping")
-                return None
-            angle = 0
-            if hasattr(d, 'GetParentModule'):
-                parent_footprint = d.GetParentModule()
-            else:
-                parent_footprint = d.GetParentFootprint()
-            if parent_footprint is not None and KICAD_VERSION[0] < 8:
-                angle = self.normalize_angle(parent_footprint.GetOrientation())
-            shape_dict = {
-                "type": shape,
-                "pos": start,
-                "angle": angle,
-                "polygons": polygons
-            }
-            if hasattr(d, "IsFilled") and not d.IsFilled():
-                shape_dict["filled"] = 0
-                shape_dict["width"] = d.GetWidth() * 1e-6
-            return shape_dict
-        if shape == "curve":
-            if hasattr(d, "GetBezierC1"):
-                c1 = self.normalize(d.GetBezierC1())
-                c2 = self.normalize(d.GetBezierC2())
-            else:
-                c1 = self.normalize(d.GetBezControl1())
-                c2 = self.normalize(d.GetBezControl2())
-            return {
-                "type": shape,
-                "start": start,
-                "cpa": c1,
-                "cpb": c2,
-                "end": end,
-                "width": d.GetWidth() * 1e-6
-            }
+    def parse_rect_shape(self, d):
+        # type: (pcbnew.PCB_SHAPE) -> dict
+        if hasattr(d, "GetRectCorners"):
+            points = list(map(self.normalize, d.GetRectCorners()))
+        else:
+            start = self.normalize(d.GetStart())
+            end = self.normalize(d.GetEnd())
+            points = [
+                start,
+                [end[0], start[1]],
+                end,
+                [start[0], end[1]]
+            ]
+        shape_dict = {
+            "type": "polygon",
+            "pos": [0, 0],
+            "angle": 0,
+            "polygons": [points],
+            "width": d.GetWidth() * 1e-6,
+            "filled": 0
+        }
+        if hasattr(d, "IsFilled") and d.IsFilled():
+            shape_dict["filled"] = 1
+        return shape_dict
+
+    def parse_circle_shape(self, d):
+        # type: (pcbnew.PCB_SHAPE) -> dict
+        shape_dict = {
+            "type": "circle",
+            "start": self.normalize(d.GetStart()),
+            "radius": d.GetRadius() * 1e-6,
+            "width": d.GetWidth() * 1e-6
+        }
+        if hasattr(d, "IsFilled") and d.IsFilled():
+            shape_dict["filled"] = 1
+        return shape_dict
+
+    def parse_arc_shape(self, d):
+        # type: (pcbnew.PCB_SHAPE) -> dict
+        a1, a2 = self.get_arc_angles(d)
+        if hasattr(d, "GetCenter"):
+            start = self.normalize(d.GetCenter())
+        else:
+            start = self.normalize(d.GetStart())
+        return {
+            "type": "arc",
+            "start": start,
+            "radius": d.GetRadius() * 1e-6,
+            "startangle": a1,
+            "endangle": a2,
+            "width": d.GetWidth() * 1e-6
+        }
+
+    def parse_polygon_shape(self, d):
+        # type: (pcbnew.PCB_SHAPE) -> dict | None
+        if hasattr(d, "GetPolyShape"):
+            polygons = self.parse_poly_set(d.GetPolyShape())
+        else:
+            self.unsupported["polygon (KiCad 4)"] += 1
+            return None
+        angle = 0
+        if hasattr(d, 'GetParentModule'):
+            parent_footprint = d.GetParentModule()
+        else:
+            parent_footprint = d.GetParentFootprint()
+        if parent_footprint is not None and KICAD_VERSION[0] < 8:
+            angle = self.normalize_angle(parent_footprint.GetOrientation())
+        shape_dict = {
+            "type": "polygon",
+            "pos": self.normalize(d.GetStart()),
+            "angle": angle,
+            "polygons": polygons
+        }
+        if hasattr(d, "IsFilled") and not d.IsFilled():
+            shape_dict["filled"] = 0
+            shape_dict["width"] = d.GetWidth() * 1e-6
+        return shape_dict
+
+    def parse_curve_shape(self, d):
+        # type: (pcbnew.PCB_SHAPE) -> dict
+        if hasattr(d, "GetBezierC1"):
+            c1 = self.normalize(d.GetBezierC1())
+            c2 = self.normalize(d.GetBezierC2())
+        else:
+            c1 = self.normalize(d.GetBezControl1())
+            c2 = self.normalize(d.GetBezControl2())
+        return {
+            "type": "curve",
+            "start": self.normalize(d.GetStart()),
+            "cpa": c1,
+            "cpb": c2,
+            "end": self.normalize(d.GetEnd()),
+            "width": d.GetWidth() * 1e-6
+        }
 
     def parse_line_chain(self, shape):
         # type: (pcbnew.SHAPE_LINE_CHAIN) -> list
@@ -237,32 +353,34 @@ class PcbnewParser(EcadParser):
                              "Unpatched kicad version?")
             return result
 
-        for point_index in range(shape.PointCount()):
-            result.append(
-                self.normalize(shape.CPoint(point_index)))
+        # Convert all points in one pass, this is the hot loop for zones
+        # and large polygons so avoid per point method lookups.
+        result = [[p.x * 1e-6, p.y * 1e-6]
+                  for p in map(shape.CPoint, range(shape.PointCount()))]
 
         return result
 
     def parse_poly_set(self, poly):
         # type: (pcbnew.SHAPE_POLY_SET) -> list
-        result = []
-
-        for i in range(poly.OutlineCount()):
-            result.append(self.parse_line_chain(poly.Outline(i)))
-
-        return result
+        parse_line_chain = self.parse_line_chain
+        return [parse_line_chain(outline)
+                for outline in map(poly.Outline, range(poly.OutlineCount()))]
 
     def parse_text(self, d):
         # type: (pcbnew.PCB_TEXT) -> dict
         if not d.IsVisible() and d.GetClass() not in ["PTEXT", "PCB_TEXT"]:
             return None
+        if not d.GetText().strip():
+            # Nothing to render, skip building text geometry.
+            return None
         pos = self.normalize(d.GetPosition())
         if hasattr(d, "GetTextThickness"):
             thickness = d.GetTextThickness() * 1e-6
         else:
             thickness = d.GetThickness() * 1e-6
         if hasattr(d, 'TransformToSegmentList'):
-            segments = [self.normalize(p) for p in d.TransformToSegmentList()]
+            segments = [[p.x * 1e-6, p.y * 1e-6]
+                        for p in d.TransformToSegmentList()]
             lines = []
             for i in range(0, len(segments), 2):
                 if i == 0 or segments[i - 1] != segments[i]:
@@ -277,15 +395,14 @@ class PcbnewParser(EcadParser):
             segments = []
             polygons = []
             for s in shape.GetSubshapes():
-                if s.Type() == pcbnew.SH_LINE_CHAIN:
+                s_type = s.Type()
+                if s_type == pcbnew.SH_SEGMENT:
+                    segments.append(self.normalize_segment(s.GetSeg()))
+                elif s_type == pcbnew.SH_LINE_CHAIN:
                     polygons.append(self.parse_line_chain(s))
-                elif s.Type() == pcbnew.SH_SEGMENT:
-                    seg = s.GetSeg()
-                    segments.append(
-                        [self.normalize(seg.A), self.normalize(seg.B)])
                 else:
                     self.logger.warn(
-                        "Unsupported subshape in text: %s" % s.Type())
+                        "Unsupported subshape in text: %s" % s_type)
             if segments:
                 return {
                     "thickness": thickness,
@@ -339,16 +456,15 @@ class PcbnewParser(EcadParser):
         circles = []
         for s in d.GetShapes():
             s = s.Cast()
-            if s.Type() == pcbnew.SH_SEGMENT:
-                seg = s.GetSeg()
-                segments.append(
-                    [self.normalize(seg.A), self.normalize(seg.B)])
-            elif s.Type() == pcbnew.SH_CIRCLE:
+            s_type = s.Type()
+            if s_type == pcbnew.SH_SEGMENT:
+                segments.append(self.normalize_segment(s.GetSeg()))
+            elif s_type == pcbnew.SH_CIRCLE:
                 circles.append(
                     [self.normalize(s.GetCenter()), s.GetRadius() * 1e-6])
             else:
                 self.logger.info(
-                    "Unsupported shape type in dimension object: %s", s.Type())
+                    "Unsupported shape type in dimension object: %s", s_type)
 
         svgpath = create_path(segments, circles=circles)
 
@@ -361,11 +477,11 @@ class PcbnewParser(EcadParser):
         # type: (pcbnew.BOARD_ITEM) -> list
         result = []
         s = None
-        if d.GetClass() in ["DRAWSEGMENT", "MGRAPHIC", "PCB_SHAPE"]:
-            s = self.parse_shape(d)
-        elif d.GetClass() in ["PTEXT", "MTEXT", "FP_TEXT", "PCB_TEXT", "PCB_FIELD"]:
-            s = self.parse_text(d)
-        elif (d.GetClass().startswith("PCB_DIM")
+        d_class = d.GetClass()
+        drawing_parser = self.drawing_parsers.get(d_class)
+        if drawing_parser is not None:
+            s = drawing_parser(d)
+        elif (d_class.startswith("PCB_DIM")
               and hasattr(pcbnew, "VECTOR_SHAPEPTR")):
             result.append(self.parse_dimension(d))
             if hasattr(d, "Text"):
@@ -373,57 +489,57 @@ class PcbnewParser(EcadParser):
             else:
                 s = self.parse_text(d)
         else:
-            self.logger.info("Unsupported drawing class %s, skipping",
-                             d.GetClass())
+            self.unsupported["drawing class %s" % d_class] += 1
         if s:
             result.append(s)
         return result
 
-    def parse_edges(self, pcb):
+    def parse_edges(self, board_drawings, footprint_drawings):
         edges = []
-        drawings = list(pcb.GetDrawings())
         bbox = None
-        for f in self.footprints:
-            for g in f.GraphicalItems():
-                drawings.append(g)
+        drawings = itertools.chain(
+            board_drawings, itertools.chain.from_iterable(footprint_drawings))
         for d in drawings:
             if d.GetLayer() == pcbnew.Edge_Cuts:
-                for parsed_drawing in self.parse_drawing(d):
-                    edges.append(parsed_drawing)
-                    if bbox is None:
-                        bbox = d.GetBoundingBox()
-                    else:
-                        bbox.Merge(d.GetBoundingBox())
-        if bbox:
-            bbox.Normalize()
-        return edges, bbox
-
-    def parse_drawings_on_layers(self, drawings, f_layer, b_layer):
-        front = []
-        back = []
-
-        for d in drawings:
-            if d[1].GetLayer() not in [f_layer, b_layer]:
-                continue
-            for drawing in self.parse_drawing(d[1]):
-                if d[0] in ["ref", "val"]:
-                    drawing[d[0]] = 1
-                if d[1].GetLayer() == f_layer:
-                    front.append(drawing)
+                parsed_drawings = self.parse_drawing(d)
+                if not parsed_drawings:
+                    continue
+                edges.extend(parsed_drawings)
+                # Merge once per edge item, not once per parsed drawing.
+                if bbox is None:
+                    bbox = d.GetBoundingBox()
                 else:
-                    back.append(drawing)
-
-        return {
-            "F": front,
-            "B": back
+                    bbox.Merge(d.GetBoundingBox())
+        if bbox is None:
+            return edges, None
+        bbox.Normalize()
+        return edges, {
+            "minx": bbox.GetX() * 1e-6,
+            "miny": bbox.GetY() * 1e-6,
+            "maxx": bbox.GetRight() * 1e-6,
+            "maxy": bbox.GetBottom() * 1e-6,
         }
 
-    def get_all_drawings(self):
-        drawings = [(d.GetClass(), d) for d in list(self.board.GetDrawings())]
-        for f in self.footprints:
+    def parse_drawings_on_layers(self, drawings, layer_map):
+        """Parses drawings in a single pass, appending each one to the list
+        that layer_map associates with its layer. Drawings on layers not
+        present in layer_map are skipped."""
+        for tag, d in drawings:
+            target = layer_map.get(d.GetLayer())
+            if target is None:
+                continue
+            parsed_drawings = self.parse_drawing(d)
+            if tag in ["ref", "val"]:
+                for drawing in parsed_drawings:
+                    drawing[tag] = 1
+            target.extend(parsed_drawings)
+
+    def get_all_drawings(self, board_drawings, footprint_drawings):
+        drawings = [(d.GetClass(), d) for d in board_drawings]
+        for f, f_drawings in zip(self.footprints, footprint_drawings):
             drawings.append(("ref", f.Reference()))
             drawings.append(("val", f.Value()))
-            for d in f.GraphicalItems():
+            for d in f_drawings:
                 drawings.append((d.GetClass(), d))
             if hasattr(f, "GetFields"):
                 fields = f.GetFields() # type: list[pcbnew.PCB_FIELD]
@@ -434,34 +550,21 @@ class PcbnewParser(EcadParser):
 
         return drawings
 
-    def parse_pad(self, pad):
-        # type: (pcbnew.PAD) -> dict | None
+    def parse_pad(self, pad, include_nets):
+        # type: (pcbnew.PAD, bool) -> dict | None
         layers_set = list(pad.GetLayerSet().Seq())
         layers = []
         if pcbnew.F_Cu in layers_set:
             layers.append("F")
         if pcbnew.B_Cu in layers_set:
             layers.append("B")
-        pos = self.normalize(pad.GetPosition())
-        size = self.normalize(pad.GetSize())
+        normalize = self.normalize
+        pos = normalize(pad.GetPosition())
+        size = normalize(pad.GetSize())
         angle = self.normalize_angle(pad.GetOrientation())
-        shape_lookup = {
-            pcbnew.PAD_SHAPE_RECT: "rect",
-            pcbnew.PAD_SHAPE_OVAL: "oval",
-            pcbnew.PAD_SHAPE_CIRCLE: "circle",
-        }
-        if hasattr(pcbnew, "PAD_SHAPE_TRAPEZOID"):
-            shape_lookup[pcbnew.PAD_SHAPE_TRAPEZOID] = "trapezoid"
-        if hasattr(pcbnew, "PAD_SHAPE_ROUNDRECT"):
-            shape_lookup[pcbnew.PAD_SHAPE_ROUNDRECT] = "roundrect"
-        if hasattr(pcbnew, "PAD_SHAPE_CUSTOM"):
-            shape_lookup[pcbnew.PAD_SHAPE_CUSTOM] = "custom"
-        if hasattr(pcbnew, "PAD_SHAPE_CHAMFERED_RECT"):
-            shape_lookup[pcbnew.PAD_SHAPE_CHAMFERED_RECT] = "chamfrect"
-        shape = shape_lookup.get(pad.GetShape(), "")
+        shape = _PAD_SHAPE_MAP.get(pad.GetShape(), "")
         if shape == "":
-            self.logger.info("Unsupported pad shape %s, skipping.",
-                             pad.GetShape())
+            self.unsupported["pad shape %s" % pad.GetShape()] += 1
             return None
         pad_dict = {
             "layers": layers,
@@ -478,148 +581,121 @@ class PcbnewParser(EcadParser):
         if shape == "trapezoid":
             # treat trapezoid as custom shape
             pad_dict["shape"] = "custom"
-            delta = self.normalize(pad.GetDelta())
-            pad_dict["polygons"] = [[
-                [size[0] / 2 + delta[1] / 2, size[1] / 2 - delta[0] / 2],
-                [-size[0] / 2 - delta[1] / 2, size[1] / 2 + delta[0] / 2],
-                [-size[0] / 2 + delta[1] / 2, -size[1] / 2 - delta[0] / 2],
-                [size[0] / 2 - delta[1] / 2, -size[1] / 2 + delta[0] / 2],
-            ]]
+            delta = normalize(pad.GetDelta())
+            pad_dict["polygons"] = [trapezoid_polygon(size, delta)]
 
         if shape in ["roundrect", "chamfrect"]:
             pad_dict["radius"] = pad.GetRoundRectCornerRadius() * 1e-6
         if shape == "chamfrect":
             pad_dict["chamfpos"] = pad.GetChamferPositions()
             pad_dict["chamfratio"] = pad.GetChamferRectRatio()
-        if hasattr(pcbnew, 'PAD_ATTRIB_PTH'):
-            through_hole_attributes = [pcbnew.PAD_ATTRIB_PTH,
-                                       pcbnew.PAD_ATTRIB_NPTH]
-        else:
-            through_hole_attributes = [pcbnew.PAD_ATTRIB_STANDARD,
-                                       pcbnew.PAD_ATTRIB_HOLE_NOT_PLATED]
-        if pad.GetAttribute() in through_hole_attributes:
+        if pad.GetAttribute() in _THROUGH_HOLE_ATTRIBUTES:
             pad_dict["type"] = "th"
-            pad_dict["drillshape"] = {
-                pcbnew.PAD_DRILL_SHAPE_CIRCLE: "circle",
-                pcbnew.PAD_DRILL_SHAPE_OBLONG: "oblong"
-            }.get(pad.GetDrillShape())
-            pad_dict["drillsize"] = self.normalize(pad.GetDrillSize())
+            pad_dict["drillshape"] = _DRILL_SHAPE_MAP.get(pad.GetDrillShape())
+            pad_dict["drillsize"] = normalize(pad.GetDrillSize())
         else:
             pad_dict["type"] = "smd"
         if hasattr(pad, "GetOffset"):
-            pad_dict["offset"] = self.normalize(pad.GetOffset())
-        if self.config.include_nets:
+            pad_dict["offset"] = normalize(pad.GetOffset())
+        if include_nets:
             pad_dict["net"] = pad.GetNetname()
 
         return pad_dict
 
-    def parse_footprints(self):
-        # type: () -> list
-        footprints = []
-        for f in self.footprints:
-            ref = f.GetReference()
+    def parse_footprint(self, f, f_drawings, include_nets):
+        # type: (pcbnew.FOOTPRINT, list, bool) -> dict
+        ref = f.GetReference()
 
-            # bounding box
-            if hasattr(pcbnew, 'MODULE'):
-                f_copy = pcbnew.MODULE(f)
-            else:
-                f_copy = pcbnew.FOOTPRINT(f)
+        # bounding box
+        f_copy = _FOOTPRINT_CLASS(f)
+        try:
+            f_copy.SetOrientation(0)
+        except TypeError:
+            f_copy.SetOrientation(
+                pcbnew.EDA_ANGLE(0, pcbnew.TENTHS_OF_A_DEGREE_T))
+        pos = f_copy.GetPosition()
+        pos.x = pos.y = 0
+        f_copy.SetPosition(pos)
+        if hasattr(f_copy, 'GetFootprintRect'):
+            footprint_rect = f_copy.GetFootprintRect()
+        else:
             try:
-                f_copy.SetOrientation(0)
+                footprint_rect = f_copy.GetBoundingBox(False, False)
             except TypeError:
-                f_copy.SetOrientation(
-                    pcbnew.EDA_ANGLE(0, pcbnew.TENTHS_OF_A_DEGREE_T))
-            pos = f_copy.GetPosition()
-            pos.x = pos.y = 0
-            f_copy.SetPosition(pos)
-            if hasattr(f_copy, 'GetFootprintRect'):
-                footprint_rect = f_copy.GetFootprintRect()
-            else:
-                try:
-                    footprint_rect = f_copy.GetBoundingBox(False, False)
-                except TypeError:
-                    footprint_rect = f_copy.GetBoundingBox(False)
-            bbox = {
-                "pos": self.normalize(f.GetPosition()),
-                "relpos": self.normalize(footprint_rect.GetPosition()),
-                "size": self.normalize(footprint_rect.GetSize()),
-                "angle": self.normalize_angle(f.GetOrientation()),
-            }
+                footprint_rect = f_copy.GetBoundingBox(False)
+        bbox = {
+            "pos": self.normalize(f.GetPosition()),
+            "relpos": self.normalize(footprint_rect.GetPosition()),
+            "size": self.normalize(footprint_rect.GetSize()),
+            "angle": self.normalize_angle(f.GetOrientation()),
+        }
 
-            # graphical drawings
-            drawings = []
-            for d in f.GraphicalItems():
-                # we only care about copper ones, silkscreen is taken care of
-                if d.GetLayer() not in [pcbnew.F_Cu, pcbnew.B_Cu]:
-                    continue
-                for drawing in self.parse_drawing(d):
-                    drawings.append({
-                        "layer": "F" if d.GetLayer() == pcbnew.F_Cu else "B",
-                        "drawing": drawing,
-                    })
-
-            # footprint pads
-            pads = []
-            for p in f.Pads():
-                pad_dict = self.parse_pad(p)
-                if pad_dict is not None:
-                    pads.append((p.GetPadName(), pad_dict))
-
-            if pads:
-                # Try to guess first pin name.
-                pads = sorted(pads, key=lambda el: el[0])
-                pin1_pads = [p for p in pads if p[0] in
-                             ['1', 'A', 'A1', 'P1', 'PAD1']]
-                if pin1_pads:
-                    pin1_pad_name = pin1_pads[0][0]
-                else:
-                    # No pads have common first pin name,
-                    # pick lexicographically smallest.
-                    pin1_pad_name = pads[0][0]
-                for pad_name, pad_dict in pads:
-                    if pad_name == pin1_pad_name:
-                        pad_dict['pin1'] = 1
-
-            pads = [p[1] for p in pads]
-
-            # add footprint
-            footprints.append({
-                "ref": ref,
-                "bbox": bbox,
-                "pads": pads,
-                "drawings": drawings,
-                "layer": {
-                    pcbnew.F_Cu: "F",
-                    pcbnew.B_Cu: "B"
-                }.get(f.GetLayer())
-            })
-
-        return footprints
+        # graphical drawings
+        drawings = []
+        for d in f_drawings:
+            # we only care about copper ones, silkscreen is taken care of
+            layer = _LAYER_MAP.get(d.GetLayer())
+            if layer is None:
+                continue
+            for drawing in self.parse_drawing(d):
+                drawings.append({
+                    "layer": layer,
+                    "drawing": drawing,
+                })
+
+        # footprint pads
+        pads = []
+        for p in f.Pads():
+            pad_dict = self.parse_pad(p, include_nets)
+            if pad_dict is not None:
+                pads.append((p.GetPadName(), pad_dict))
+
+        pads = mark_pin1(pads)
+
+        return {
+            "ref": ref,
+            "bbox": bbox,
+            "pads": pads,
+            "drawings": drawings,
+            "layer": _LAYER_MAP.get(f.GetLayer())
+        }
+
+    def parse_footprints(self, footprint_drawings):
+        # type: (list) -> list
+        # pcbnew objects can not be pickled and the scripting API is not
+        # thread safe, so footprints are parsed sequentially.
+        include_nets = self.config.include_nets
+        return [self.parse_footprint(f, f_drawings, include_nets)
+                for f, f_drawings in zip(self.footprints, footprint_drawings)]
 
     def parse_tracks(self, tracks):
         tent_vias = True
         if hasattr(self.board, "GetTentVias"):
             tent_vias = self.board.GetTentVias()
-        result = {pcbnew.F_Cu: [], pcbnew.B_Cu: []}
+        normalize = self.normalize
+        include_nets = self.config.include_nets
+        result_f, result_b = [], []
+        result = {pcbnew.F_Cu: result_f, pcbnew.B_Cu: result_b}
         for track in tracks:
-            if track.GetClass() in ["VIA", "PCB_VIA"]:
+            if track.GetClass() in _VIA_CLASSES:
                 track_dict = {
-                    "start": self.normalize(track.GetStart()),
-                    "end": self.normalize(track.GetEnd()),
+                    "start": normalize(track.GetStart()),
+                    "end": normalize(track.GetEnd()),
                     "width": track.GetWidth() * 1e-6,
                     "net": track.GetNetname(),
                 }
                 if not tent_vias:
                     track_dict["drillsize"] = track.GetDrillValue() * 1e-6
-                for layer in [pcbnew.F_Cu, pcbnew.B_Cu]:
+                for layer, layer_tracks in result.items():
                     if track.IsOnLayer(layer):
-                        result[layer].append(track_dict)
+                        layer_tracks.append(track_dict)
             else:
-                if track.GetLayer() in [pcbnew.F_Cu, pcbnew.B_Cu]:
-                    if track.GetClass() in ["ARC", "PCB_ARC"]:
+                layer_tracks = result.get(track.GetLayer())
+                if layer_tracks is not None:
+                    if track.GetClass() in _ARC_CLASSES:
                         a1, a2 = self.get_arc_angles(track)
                         track_dict = {
-                            "center": self.normalize(track.GetCenter()),
+                            "center": normalize(track.GetCenter()),
                             "startangle": a1,
                             "endangle": a2,
                             "radius": track.GetRadius() * 1e-6,
@@ -627,29 +703,31 @@ class PcbnewParser(EcadParser):
                         }
                     else:
                         track_dict = {
-                            "start": self.normalize(track.GetStart()),
-                            "end": self.normalize(track.GetEnd()),
+                            "start": normalize(track.GetStart()),
+                            "end": normalize(track.GetEnd()),
                             "width": track.GetWidth() * 1e-6,
                         }
-                    if self.config.include_nets:
+                    if include_nets:
                         track_dict["net"] = track.GetNetname()
-                    result[track.GetLayer()].append(track_dict)
+                    layer_tracks.append(track_dict)
 
         return {
-            'F': result.get(pcbnew.F_Cu),
-            'B': result.get(pcbnew.B_Cu)
+            'F': result_f,
+            'B': result_b
         }
 
     def parse_zones(self, zones):
         # type: (list[pcbnew.ZONE]) -> dict
-        result = {pcbnew.F_Cu: [], pcbnew.B_Cu: []}
+        include_nets = self.config.include_nets
+        result_f, result_b = [], []
+        result = {pcbnew.F_Cu: result_f, pcbnew.B_Cu: result_b}
         for zone in zones:
             if (not zone.IsFilled() or
                     hasattr(zone, 'GetIsKeepout') and zone.GetIsKeepout() or
                     hasattr(zone, 'GetIsRuleArea') and zone.GetIsRuleArea()):
                 continue
-            layers = [layer for layer in list(zone.GetLayerSet().Seq())
-                      if layer in [pcbnew.F_Cu, pcbnew.B_Cu]]
+            layers = [layer for layer in zone.GetLayerSet().Seq()
+                      if layer in _LAYER_MAP]
             for layer in layers:
                 try:
                     # kicad 5.1 and earlier
@@ -664,13 +742,13 @@ class PcbnewParser(EcadParser):
                     "polygons": self.parse_poly_set(poly_set),
                     "width": width,
                 }
-                if self.config.include_nets:
+                if include_nets:
                     zone_dict["net"] = zone.GetNetname()
                 result[layer].append(zone_dict)
 
         return {
-            'F': result.get(pcbnew.F_Cu),
-            'B': result.get(pcbnew.B_Cu)
+            'F': result_f,
+            'B': result_b
         }
 
     @staticmethod
@@ -681,7 +759,7 @@ class PcbnewParser(EcadParser):
         return nets
 
     @staticmethod
-    def footprint_to_component(footprint, extra_fields):
+    def footprint_to_component(footprint, extra_fields=None):
         try:
             footprint_name = str(footprint.GetFPID().GetFootprintName())
         except AttributeError:
@@ -694,10 +772,7 @@ class PcbnewParser(EcadParser):
         elif hasattr(pcbnew, 'MOD_VIRTUAL'):
             if footprint.GetAttributes() == pcbnew.MOD_VIRTUAL:
                 attr = 'Virtual'
-        layer = {
-            pcbnew.F_Cu: 'F',
-            pcbnew.B_Cu: 'B',
-        }.get(footprint.GetLayer())
+        layer = _LAYER_MAP.get(footprint.GetLayer())
 
         return Component(footprint.GetReference(),
                          footprint.GetValue(),
@@ -706,9 +781,18 @@ class PcbnewParser(EcadParser):
                          attr,
                          extra_fields)
 
+    def log_unsupported(self):
+        if self.unsupported:
+            self.logger.info(
+                "Skipped unsupported items: %s",
+                ", ".join("%s (%d)" % item
+                          for item in sorted(self.unsupported.items())))
+
     def parse(self):
         from ..errors import ParsingException
 
+        self.unsupported.clear()
+
         # Get extra field data from netlist
         field_set = set(self.config.show_fields)
         field_set.discard("Value")
@@ -754,31 +838,37 @@ class PcbnewParser(EcadParser):
         if not title:
             # remove .kicad_pcb extension
             title = os.path.splitext(pcb_file_name)[0]
-        edges, bbox = self.parse_edges(self.board)
+        # Collect board and footprint drawings once, they are reused by
+        # edges, silkscreen/fabrication and footprint copper parsing.
+        board_drawings = list(self.board.GetDrawings())
+        footprint_drawings = [list(f.GraphicalItems())
+                              for f in self.footprints]
+        edges, bbox = self.parse_edges(board_drawings, footprint_drawings)
         if bbox is None:
             self.logger.error('Please draw pcb outline on the edges '
                               'layer on sheet or any footprint before '
                               'generating BOM.')
+            self.log_unsupported()
             return None, None
-        bbox = {
-            "minx": bbox.GetPosition().x * 1e-6,
-            "miny": bbox.GetPosition().y * 1e-6,
-            "maxx": bbox.GetRight() * 1e-6,
-            "maxy": bbox.GetBottom() * 1e-6,
-        }
 
-        drawings = self.get_all_drawings()
+        silkscreen = {"F": [], "B": []}
+        fabrication = {"F": [], "B": []}
+        drawings = self.get_all_drawings(board_drawings, footprint_drawings)
+        self.parse_drawings_on_layers(drawings, {
+            pcbnew.F_SilkS: silkscreen["F"],
+            pcbnew.B_SilkS: silkscreen["B"],
+            pcbnew.F_Fab: fabrication["F"],
+            pcbnew.B_Fab: fabrication["B"],
+        })
 
         pcbdata = {
             "edges_bbox": bbox,
             "edges": edges,
             "drawings": {
-                "silkscreen": self.parse_drawings_on_layers(
-                    drawings, pcbnew.F_SilkS, pcbnew.B_SilkS),
-                "fabrication": self.parse_drawings_on_layers(
-                    drawings, pcbnew.F_Fab, pcbnew.B_Fab),
+                "silkscreen": silkscreen,
+                "fabrication": fabrication,
             },
-            "footprints": self.parse_footprints(),
+            "footprints": self.parse_footprints(footprint_drawings),
             "metadata": {
                 "title": title,
                 "revision": revision,
@@ -809,22 +899,31 @@ class PcbnewParser(EcadParser):
                 warning_shown = False
 
                 for f in self.footprints:
-                    extra_fields.append(field_map.get(f.GetReference(), {}))
-                    if f.GetReference() not in field_map:
+                    ref = f.GetReference()
+                    if ref in field_map:
+                        extra_fields.append(field_map[ref])
+                    else:
+                        extra_fields.append({})
                         # Some components are on pcb but not in schematic data.
                         # Show a warning about outdated extra data file.
                         self.logger.warn(
                             'Component %s is missing from schematic data.'
-                            % f.GetReference())
+                            % ref)
                         warning_shown = True
 
                 if warning_shown:
                     self.logger.warn('Netlist/xml file is likely out of date.')
         else:
-            extra_fields = [{}] * len(self.footprints)
+            extra_fields = None
+
+        if extra_fields is None:
+            components = [self.footprint_to_component(f)
+                          for f in self.footprints]
+        else:
+            components = [self.footprint_to_component(f, e)
+                          for (f, e) in zip(self.footprints, extra_fields)]
 
-        components = [self.footprint_to_component(f, e)
-                      for (f, e) in zip(self.footprints, extra_fields)]
+        self.log_unsupported()
 
         return pcbdata, components
 
@@ -510,29 +510,35 @@ def parse_path(pathdef, logger, current_pos=0j):
     return segments
 
 
-def create_path(lines, circles=[]):
-    """Returns a path d-string."""
+def _limit_digits(val):
+    return format(val, '.6f').rstrip('0').replace(',', '.').rstrip('.')
+
 
-    def limit_digits(val):
-        return format(val, '.6f').rstrip('0').replace(',', '.').rstrip('.')
+def _different_points(a, b):
+    return abs(a[0] - b[0]) > 1e-6 or abs(a[1] - b[1]) > 1e-6
 
-    def different_points(a, b):
-        return abs(a[0] - b[0]) > 1e-6 or abs(a[1] - b[1]) > 1e-6
+
+def create_path(lines, circles=[]):
+    """Returns a path d-string."""
+    limit_digits = _limit_digits
 
     parts = []
+    append = parts.append
 
     for i, line in enumerate(lines):
-        if i == 0 or different_points(lines[i - 1][-1], line[0]):
-            parts.append('M{},{}'.format(*map(limit_digits, line[0])))
+        if i == 0 or _different_points(lines[i - 1][-1], line[0]):
+            append('M{},{}'.format(
+                limit_digits(line[0][0]), limit_digits(line[0][1])))
         for point in line[1:]:
-            parts.append('L{},{}'.format(*map(limit_digits, point)))
+            append('L{},{}'.format(
+                limit_digits(point[0]), limit_digits(point[1])))
 
     for circle in circles:
         cx, cy, r = circle[0][0], circle[0][1], circle[1]
-        parts.append('M{},{}'.format(limit_digits(cx - r), limit_digits(cy)))
-        parts.append('a {},{} 0 1,0 {},0'.format(
-                     *map(limit_digits, [r, r, r + r])))
-        parts.append('a {},{} 0 1,0 -{},0'.format(
-                     *map(limit_digits, [r, r, r + r])))
+        append('M{},{}'.format(limit_digits(cx - r), limit_digits(cy)))
+        append('a {},{} 0 1,0 {},0'.format(
+               *map(limit_digits, [r, r, r + r])))
+        append('a {},{} 0 1,0 -{},0'.format(
+               *map(limit_digits, [r, r, r + r])))
 
     return ''.join(parts)